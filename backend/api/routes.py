@@ -1,14 +1,18 @@
 import cv2
+import asyncio
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import Optional
 from core.hardware_manager import HardwareManager
+from core.camera_discovery import CameraRegistry
 
 # Import the shared global instances from websockets so the API and WebSocket share the same AI and Log Queue
-from api.websockets import vision, message_queue
+from api.websockets import vision, replay, message_queue
 
 router = APIRouter()
 hw_manager = HardwareManager()
+camera_registry = CameraRegistry(vision=vision)
 
 # ================= PYDANTIC MODELS =================
 class SystemConfig(BaseModel):
@@ -25,6 +29,16 @@ class RecordCommand(BaseModel):
 class CommandPayload(BaseModel):
     command: str
 
+class ReplayStart(BaseModel):
+    session: str
+    speed: float = 1.0
+    position: float = 0.0
+
+class ReplayControl(BaseModel):
+    speed: Optional[float] = None
+    position: Optional[float] = None
+    paused: Optional[bool] = None
+
 # ================= IN-MEMORY STORAGE =================
 current_settings = {
    "min_confidence": 0.85,
@@ -88,7 +102,9 @@ async def toggle_record():
 def gen_frames():
     """Generator function to continuously yield JPEG frames from OpenCV"""
     while True:
-        frame, _ = vision.get_latest_frame_and_detections()
+        # Replay sessions take over the feed; the live camera resumes when the replay stops
+        source = replay if replay.is_active else vision
+        frame, _ = source.get_latest_frame_and_detections()
         if frame is not None:
             # Encode frame as JPEG
             ret, buffer = cv2.imencode('.jpg', frame)
@@ -102,6 +118,51 @@ async def video_feed():
     return StreamingResponse(gen_frames(), media_type="multipart/x-mixed-replace; boundary=frame")
 
 
+# ================= SESSION REPLAY =================
+
+@router.get("/api/replay/sessions")
+async def list_replay_sessions():
+    return {"sessions": replay.list_sessions()}
+
+@router.get("/api/replay/status")
+async def get_replay_status():
+    return replay.get_status()
+
+@router.post("/api/replay/start")
+async def start_replay(payload: ReplayStart):
+    try:
+        await asyncio.to_thread(replay.start, payload.session, payload.speed, payload.position)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    message_queue.append({"msg": f"REPLAY: {payload.session} @ {payload.speed:g}x", "level": "WARN"})
+    return replay.get_status()
+
+@router.post("/api/replay/control")
+async def control_replay(payload: ReplayControl):
+    """Fast-forward (speed), seek (position in seconds) and pause/resume the active replay."""
+    if not replay.is_active:
+        raise HTTPException(status_code=409, detail="No replay is active")
+    try:
+        if payload.speed is not None:
+            replay.set_speed(payload.speed)
+        if payload.position is not None:
+            replay.seek(payload.position)
+        if payload.paused is not None:
+            replay.set_paused(payload.paused)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return replay.get_status()
+
+@router.post("/api/replay/stop")
+async def stop_replay():
+    replay.stop()
+    message_queue.append({"msg": "REPLAY ENDED: Live feed restored.", "level": "SUCCESS"})
+    return replay.get_status()
+
+
 # ================= TERMINAL COMMAND ROUTE =================
 
 @router.post("/api/command")
@@ -146,6 +207,16 @@ async def execute_command(payload: CommandPayload):
 async def get_hardware_status():
     return hw_manager.get_hardware_telemetry()
 
+@router.get("/api/cameras")
+async def list_cameras(refresh: bool = False):
+    """Cached camera inventory. Only re-probes when device nodes change or ?refresh=true is passed."""
+    devices = await asyncio.to_thread(camera_registry.get_devices, refresh)
+    return {
+        "active_index": vision.camera_index,
+        "last_scan": camera_registry.last_scan,
+        "devices": devices
+    }
+
 @router.post("/api/hardware/calibrate/{node_id}")
 async def calibrate_node(node_id: str):
     # Simulation: Log the calibration to the terminal
@@ -2,12 +2,14 @@ import asyncio
 import time
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from core.vision import VisionEngine
+from core.replay import ReplayEngine
 from core.math_engine import TargetTracker
 from core.serial_bridge import SerialBridge
 from models.telemetry import TelemetryData
 
 router = APIRouter()
 vision = VisionEngine()
+replay = ReplayEngine()
 tracker = TargetTracker()
 message_queue = []
 
@@ -48,14 +50,41 @@ async def telemetry_endpoint(websocket: WebSocket):
     
     try:
         while True:
-            frame, detection = vision.get_latest_frame_and_detections()
-            
             sys_log = None
             log_lvl = "INFO"
             if len(message_queue) > 0:
                 msg_data = message_queue.pop(0)
                 sys_log = msg_data["msg"]
                 log_lvl = msg_data["level"]
+                # Keep the event log in the mission sidecar so replays show it too
+                vision.record_event(sys_log, log_lvl)
+            elif replay.is_active:
+                event = replay.pop_event()
+                if event:
+                    sys_log = event["msg"]
+                    log_lvl = event["level"]
+
+            if replay.is_active:
+                # Recorded session: use the replay's own tracker and never drive the hardware bridge
+                _, detection = replay.get_latest_frame_and_detections()
+                data = TelemetryData(
+                    timestamp=replay.current_timestamp(),
+                    target_detected=bool(detection),
+                    current_x=detection["x"] if detection else None,
+                    current_y=detection["y"] if detection else None,
+                    predicted_x=detection["pred_x"] if detection else None,
+                    predicted_y=detection["pred_y"] if detection else None,
+                    confidence=detection["conf"] if detection else None,
+                    distance=detection["dist"] if detection else None,
+                    system_log=sys_log,
+                    log_level=log_lvl,
+                    replay_position=replay.position
+                )
+                await websocket.send_json(data.dict())
+                await asyncio.sleep(0.033)
+                continue
+
+            frame, detection = vision.get_latest_frame_and_detections()
 
             if detection:
                 pred_x, pred_y = tracker.predict()
@@ -0,0 +1,302 @@
+import os
+import sys
+import glob
+import time
+import struct
+import threading
+
+import cv2
+
+try:
+    import fcntl  # POSIX only; Windows falls back to the OpenCV probe below
+except ImportError:
+    fcntl = None
+
+# ==========================================
+# V4L2 IOCTL DEFINITIONS (linux/videodev2.h)
+# ==========================================
+def _iowr(nr, size):
+    # _IOC(READ|WRITE, 'V', nr, size)
+    return (3 << 30) | (size << 16) | (ord('V') << 8) | nr
+
+def _ior(nr, size):
+    # _IOC(READ, 'V', nr, size)
+    return (2 << 30) | (size << 16) | (ord('V') << 8) | nr
+
+# struct v4l2_capability: driver[16], card[32], bus_info[32], version, capabilities, device_caps, reserved[3]
+_CAPABILITY = struct.Struct("16s32s32sIII12x")
+# struct v4l2_fmtdesc: index, type, flags, description[32], pixelformat, mbus_code, reserved[3]
+_FMTDESC = struct.Struct("III32sII12x")
+# struct v4l2_frmsizeenum: index, pixel_format, type, union{discrete{w,h} | stepwise{6 x u32}}, reserved[2]
+_FRMSIZE = struct.Struct("IIIIIIIII8x")
+# struct v4l2_frmivalenum: index, pixel_format, width, height, type, union{discrete fract | stepwise 3 x fract}, reserved[2]
+_FRMIVAL = struct.Struct("IIIIIIIIIII8x")
+
+VIDIOC_QUERYCAP = _ior(0, _CAPABILITY.size)
+VIDIOC_ENUM_FMT = _iowr(2, _FMTDESC.size)
+VIDIOC_ENUM_FRAMESIZES = _iowr(74, _FRMSIZE.size)
+VIDIOC_ENUM_FRAMEINTERVALS = _iowr(75, _FRMIVAL.size)
+
+V4L2_CAP_VIDEO_CAPTURE = 0x00000001
+V4L2_CAP_DEVICE_CAPS = 0x80000000
+V4L2_BUF_TYPE_VIDEO_CAPTURE = 1
+V4L2_FRMSIZE_TYPE_DISCRETE = 1
+V4L2_FRMIVAL_TYPE_DISCRETE = 1
+
+# Hard cap on enumeration loops so a misbehaving driver can't spin us forever
+MAX_ENUM = 64
+
+
+def capture_api():
+    """Returns the OpenCV capture backend that matches the host OS."""
+    if sys.platform.startswith("linux"):
+        return cv2.CAP_V4L2
+    if sys.platform == "win32":
+        return cv2.CAP_DSHOW
+    return cv2.CAP_ANY
+
+
+def _cstr(raw):
+    return raw.split(b"\0", 1)[0].decode("utf-8", errors="replace")
+
+
+def _fourcc(code):
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip()
+
+
+def _enum(fd, request, packer, *fields):
+    """Yields unpacked ioctl results for index 0..N until the driver returns EINVAL."""
+    for index in range(MAX_ENUM):
+        buf = bytearray(packer.size)
+        struct.pack_into("I" * (1 + len(fields)), buf, 0, index, *fields)
+        try:
+            fcntl.ioctl(fd, request, buf)
+        except OSError:
+            return
+        yield packer.unpack(buf)
+
+
+def _frame_rates(fd, pixelformat, width, height):
+    rates = []
+    for ival in _enum(fd, VIDIOC_ENUM_FRAMEINTERVALS, _FRMIVAL, pixelformat, width, height):
+        ival_type, numerator, denominator = ival[4], ival[5], ival[6]
+        if ival_type != V4L2_FRMIVAL_TYPE_DISCRETE:
+            # Continuous/stepwise: report the fastest interval the driver allows
+            if numerator:
+                rates.append(round(denominator / numerator, 2))
+            break
+        if numerator:
+            rates.append(round(denominator / numerator, 2))
+    return sorted(set(rates), reverse=True)
+
+
+def _probe_v4l2(path):
+    """Reads a V4L2 node's capabilities via ioctls. Never starts streaming or grabs a frame."""
+    fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+    try:
+        cap = bytearray(_CAPABILITY.size)
+        fcntl.ioctl(fd, VIDIOC_QUERYCAP, cap)
+        driver, card, bus_info, _version, caps, device_caps = _CAPABILITY.unpack(cap)
+        if caps & V4L2_CAP_DEVICE_CAPS:
+            caps = device_caps
+        if not caps & V4L2_CAP_VIDEO_CAPTURE:
+            # Metadata / output nodes share the videoN namespace but can't feed the Vision Engine
+            return None
+
+        formats = []
+        for fmt in _enum(fd, VIDIOC_ENUM_FMT, _FMTDESC, V4L2_BUF_TYPE_VIDEO_CAPTURE):
+            description, pixelformat = fmt[3], fmt[4]
+            resolutions = []
+            for size in _enum(fd, VIDIOC_ENUM_FRAMESIZES, _FRMSIZE, pixelformat):
+                size_type = size[2]
+                if size_type == V4L2_FRMSIZE_TYPE_DISCRETE:
+                    width, height = size[3], size[4]
+                else:
+                    # Continuous/stepwise: advertise the max size only
+                    width, height = size[4], size[7]
+                resolutions.append({
+                    "width": width,
+                    "height": height,
+                    "fps": _frame_rates(fd, pixelformat, width, height)
+                })
+                if size_type != V4L2_FRMSIZE_TYPE_DISCRETE:
+                    break
+            formats.append({
+                "fourcc": _fourcc(pixelformat),
+                "description": _cstr(description),
+                "resolutions": resolutions
+            })
+
+        return {
+            "name": _cstr(card),
+            "driver": _cstr(driver),
+            "bus_info": _cstr(bus_info),
+            "formats": formats
+        }
+    finally:
+        os.close(fd)
+
+
+def describe_capture(cap, index):
+    """Builds a registry entry from an already-open VideoCapture's properties (no read())."""
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = round(cap.get(cv2.CAP_PROP_FPS), 2)
+    return {
+        "name": f"Camera {index}",
+        "driver": cap.getBackendName(),
+        "bus_info": "",
+        "formats": [{
+            "fourcc": _fourcc(int(cap.get(cv2.CAP_PROP_FOURCC))),
+            "description": "",
+            "resolutions": [{"width": width, "height": height, "fps": [fps] if fps > 0 else []}]
+        }]
+    }
+
+
+def _probe_opencv(index):
+    """Fallback for non-Linux hosts: open the index and read properties without calling read()."""
+    cap = cv2.VideoCapture(index, capture_api())
+    try:
+        if not cap.isOpened():
+            return None
+        return describe_capture(cap, index)
+    finally:
+        cap.release()
+
+
+class CameraRegistry:
+    """
+    Cached list of capture devices.
+    Probing runs in parallel with a per-device timeout. On Linux it is only repeated when
+    the set of /dev/video* nodes changes (hot-plug) or a refresh is forced. Other hosts
+    have no device nodes to watch, so they are never re-probed unless a refresh is forced.
+
+    `vision` is the live VisionEngine. On index-based backends (DirectShow) devices are
+    exclusive, so its camera index is never opened by the probe; it is described from
+    the engine's own VideoCapture instead.
+    """
+    def __init__(self, vision=None):
+        self.vision = vision
+        self.probe_timeout = float(os.getenv("CAMERA_PROBE_TIMEOUT", 2.0))
+        self.max_index = int(os.getenv("CAMERA_MAX_INDEX", 10))
+        self.is_linux = sys.platform.startswith("linux")
+
+        self.devices = []
+        self.last_scan = None
+        self._signature = None
+        self._lock = threading.Lock()
+        # Probe threads that outlived their deadline, keyed by target, so re-scans don't pile up more
+        self._hung = {}
+
+        # Warm the cache so the first GET /api/cameras doesn't pay the probe cost
+        threading.Thread(target=self.get_devices, daemon=True).start()
+
+    def _device_nodes(self):
+        """Returns (index, path) for every /dev/videoN node, ordered by N."""
+        nodes = []
+        for path in glob.glob("/dev/video*"):
+            suffix = path[len("/dev/video"):]
+            if suffix.isdigit():
+                nodes.append((int(suffix), path))
+        return sorted(nodes)
+
+    def _current_signature(self):
+        """Fingerprint of the device nodes. udev recreates nodes on plug/unplug, which changes rdev/ctime."""
+        if not self.is_linux:
+            return "static"
+        signature = []
+        for _index, path in self._device_nodes():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            signature.append((path, st.st_rdev, st.st_ctime_ns))
+        return tuple(signature)
+
+    def _scan(self):
+        if self.is_linux:
+            targets = self._device_nodes()
+            probe = _probe_v4l2
+        else:
+            targets = [(i, i) for i in range(self.max_index)]
+            probe = _probe_opencv
+            if self.vision is not None:
+                targets = [t for t in targets if t[0] != self.vision.camera_index]
+
+        # Daemon threads rather than a pool: a hung open()/ioctl must not block the
+        # deadline below or keep the interpreter from exiting
+        slots = {}
+        deadline = time.monotonic() + self.probe_timeout
+        for index, target in targets:
+            if target in self._hung and self._hung[target].is_alive():
+                slots[(index, target)] = None
+                continue
+            slot = {}
+            worker = threading.Thread(target=self._run_probe, args=(probe, target, slot),
+                                      name=f"cam-probe-{index}", daemon=True)
+            worker.start()
+            slots[(index, target)] = (worker, slot)
+
+        devices = []
+        for (index, target), pending in slots.items():
+            entry = {"index": index, "path": target if self.is_linux else None}
+            if pending is not None:
+                worker, slot = pending
+                worker.join(max(0.0, deadline - time.monotonic()))
+            if pending is None or worker.is_alive():
+                if pending is not None:
+                    self._hung[target] = worker
+                entry["status"] = "TIMEOUT"
+            else:
+                self._hung.pop(target, None)
+                if "error" in slot:
+                    # EBUSY etc. -> the node exists but someone else holds it
+                    entry["status"] = "UNAVAILABLE"
+                    entry["error"] = str(slot["error"])
+                elif slot["result"] is None:
+                    continue
+                else:
+                    entry.update(slot["result"])
+                    entry["status"] = "LIVE"
+            if not self.is_linux and entry["status"] != "LIVE":
+                # On index-based backends a failed index just means "no camera there"
+                continue
+            devices.append(entry)
+
+        if not self.is_linux and self.vision is not None:
+            devices.append(self._describe_engine_camera())
+
+        return sorted(devices, key=lambda d: d["index"])
+
+    @staticmethod
+    def _run_probe(probe, target, slot):
+        try:
+            slot["result"] = probe(target)
+        except Exception as e:
+            slot["error"] = e
+
+    def _describe_engine_camera(self):
+        """Reports the Vision Engine's camera from its own capture handle instead of reopening it."""
+        index = self.vision.camera_index
+        entry = {"index": index, "path": None}
+        camera = self.vision.camera
+        if camera is not None and camera.isOpened():
+            entry.update(describe_capture(camera, index))
+            entry["status"] = "LIVE"
+        else:
+            entry["status"] = "UNAVAILABLE"
+            entry["error"] = "Vision Engine has not opened this camera yet"
+        return entry
+
+    def get_devices(self, refresh=False):
+        """Returns the cached device list, re-probing only if nodes changed or refresh is requested."""
+        with self._lock:
+            signature = self._current_signature()
+            if refresh or signature != self._signature:
+                started = time.time()
+                self.devices = self._scan()
+                self._signature = signature
+                self.last_scan = time.time()
+                print(f"📷 Camera scan complete: {len(self.devices)} device(s) in {self.last_scan - started:.2f}s")
+            return self.devices
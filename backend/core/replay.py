@@ -0,0 +1,420 @@
+import os
+import cv2
+import glob
+import json
+import math
+import time
+import queue
+import bisect
+import threading
+from collections import deque
+from core.math_engine import TargetTracker
+
+RECORDINGS_DIR = "recordings"
+# One seek point per N recorded frames; seeking decodes at most N frames past the keyframe
+INDEX_STRIDE = 30
+# Max decoded frames held ahead of playback. This bounds memory regardless of session length.
+READ_AHEAD = int(os.getenv("REPLAY_READ_AHEAD", 60))
+
+
+def encode_record(record_type, **fields):
+    """Serialises one sidecar line. VisionEngine writes through this so "type" is always the first key."""
+    return json.dumps({"type": record_type, **fields}) + "\n"
+
+
+def _record_prefix(record_type):
+    # Derived from encode_record itself, so the index keeps matching if the writer's format changes
+    return encode_record(record_type)[:-2].encode("utf-8")
+
+
+FRAME_PREFIX = _record_prefix("frame")
+SESSION_PREFIX = _record_prefix("session")
+
+
+def _parse_line(line):
+    """Decodes a sidecar line, or returns None for a truncated/corrupt one (e.g. the process died mid-write)."""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+class SessionIndex:
+    """
+    Sparse seek index for one recording and its telemetry sidecar.
+    Built in a single pass over the .jsonl without decoding any video, and only
+    every INDEX_STRIDE-th frame line is parsed.
+    """
+    def __init__(self, video_path):
+        self.video_path = video_path
+        self.log_path = os.path.splitext(video_path)[0] + ".jsonl"
+        self.has_log = os.path.exists(self.log_path)
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise FileNotFoundError(f"Cannot open recording {video_path}")
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+        self.started = None
+        self.duration = self.frame_count / self.fps
+        # (t, frame, byte offset of the first line belonging to that frame)
+        self.entries = []
+        if self.has_log:
+            self._scan_log()
+        self.times = [entry[0] for entry in self.entries]
+
+    def _scan_log(self):
+        offset = 0
+        frame_start = 0  # Events logged since the previous frame line belong to the next frame
+        frames = 0
+        last_frame_lines = deque(maxlen=2)
+        with open(self.log_path, "rb") as f:
+            for line in f:
+                if line.startswith(FRAME_PREFIX):
+                    if frames % INDEX_STRIDE == 0:
+                        record = _parse_line(line)
+                        if record is not None and "t" in record and "frame" in record:
+                            self.entries.append((record["t"], record["frame"], frame_start))
+                    frames += 1
+                    last_frame_lines.append(line)
+                    frame_start = offset + len(line)
+                elif line.startswith(SESSION_PREFIX):
+                    record = _parse_line(line)
+                    if record is not None:
+                        self.started = record.get("started")
+                offset += len(line)
+
+        # The tail line may be truncated if the process died mid-write; fall back to the one before it
+        for line in reversed(last_frame_lines):
+            last = _parse_line(line)
+            if last is not None and "t" in last:
+                self.duration = last["t"]
+                break
+
+    def locate(self, position):
+        """Returns (frame, byte offset) of the nearest seek point at or before `position` seconds."""
+        if not self.entries:
+            return int(position * self.fps), None
+        i = max(bisect.bisect_right(self.times, position) - 1, 0)
+        _t, frame, offset = self.entries[i]
+        return frame, offset
+
+
+class ReplayEngine:
+    """
+    Re-streams a recorded session through the same shared-memory interface as VisionEngine.
+    A decoder thread reads ahead into a bounded queue; a playback thread paces frames
+    by their recorded timestamps at the requested speed.
+    """
+    def __init__(self):
+        self.is_active = False
+        self.is_paused = False
+        self.is_finished = False
+        self.session_id = None
+        self.index = None
+        self.speed = 1.0
+        self.position = 0.0
+        self.error = None
+
+        # --- SHARED MEMORY (mirrors VisionEngine) ---
+        self.current_annotated_frame = None
+        self.current_detection = None
+        self.events = deque(maxlen=256)
+
+        self.tracker = TargetTracker()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._buffer = None
+        self._player_generation = 0
+        # Decoder generation whose first frame should be shown even though playback is paused
+        self._preview_generation = None
+        self._anchor_wall = 0.0
+        self._anchor_t = 0.0
+
+    # ================= SESSION CATALOG =================
+    def list_sessions(self):
+        sessions = []
+        for path in sorted(glob.glob(os.path.join(RECORDINGS_DIR, "mission_*.mp4")), reverse=True):
+            session_id = os.path.splitext(os.path.basename(path))[0]
+            sessions.append({
+                "id": session_id,
+                "has_telemetry": os.path.exists(os.path.splitext(path)[0] + ".jsonl"),
+                "size_mb": round(os.path.getsize(path) / 1e6, 1)
+            })
+        return sessions
+
+    # ================= CONTROLS =================
+    def start(self, session_id, speed=1.0, position=0.0):
+        # Only accept bare session names so the API can't be pointed outside recordings/
+        if os.path.basename(session_id) != session_id or not session_id.startswith("mission_"):
+            raise ValueError(f"Invalid session id: {session_id}")
+        video_path = os.path.join(RECORDINGS_DIR, f"{session_id}.mp4")
+        if not os.path.exists(video_path):
+            raise FileNotFoundError(f"No recording named {session_id}")
+        self._check_speed(speed)
+        if not math.isfinite(position):
+            raise ValueError("Position must be a finite number of seconds")
+
+        index = SessionIndex(video_path)
+        with self._lock:
+            self.index = index
+            self.session_id = session_id
+            self.speed = speed
+            self.is_active = True
+            self.is_paused = False
+            self.is_finished = False
+            self.error = None
+            self.events.clear()
+            # Always start a fresh playback loop; any previous one exits on the generation change
+            self._player_generation += 1
+            player_generation = self._player_generation
+        self.seek(position)
+
+        threading.Thread(target=self._playback, args=(player_generation,), daemon=True).start()
+        print(f"⏪ REPLAY STARTED: {session_id} @ {speed}x")
+
+    def seek(self, position):
+        """Restarts decoding from `position` seconds. The previous read-ahead buffer is dropped."""
+        if not math.isfinite(position):
+            raise ValueError("Position must be a finite number of seconds")
+        with self._lock:
+            if not self.is_active:
+                return
+            index = self.index
+            position = min(max(position, 0.0), index.duration)
+            self._generation += 1
+            generation = self._generation
+            buffer = self._buffer = queue.Queue(maxsize=READ_AHEAD)
+            self.position = position
+            if self.is_finished:
+                # Seeking back from the end resumes playback
+                self.is_paused = False
+            self.is_finished = False
+            self.error = None
+            # Anything not yet sent belongs to the old position
+            self.events.clear()
+            # Scrubbing while paused still shows the frame at the new position
+            self._preview_generation = generation if self.is_paused else None
+            self.tracker = TargetTracker()
+            self._reanchor()
+        threading.Thread(target=self._decode, args=(generation, buffer, index, position), daemon=True).start()
+
+    @staticmethod
+    def _check_speed(speed):
+        if not math.isfinite(speed) or speed <= 0:
+            raise ValueError("Speed must be a positive, finite number")
+
+    def set_speed(self, speed):
+        self._check_speed(speed)
+        with self._lock:
+            self.speed = speed
+            self._reanchor()
+
+    def set_paused(self, paused):
+        with self._lock:
+            self.is_paused = paused
+            self._reanchor()
+
+    def stop(self):
+        with self._lock:
+            self.is_active = False
+            self.is_paused = False
+            self.is_finished = False
+            self.session_id = None
+            self.index = None
+            self.position = 0.0
+            self.error = None
+            self._generation += 1
+            self._player_generation += 1
+            self._buffer = None
+            self.current_annotated_frame = None
+            self.current_detection = None
+            self.events.clear()
+        print("⏹️ REPLAY STOPPED: Returning to live feed")
+
+    def get_status(self):
+        index = self.index
+        return {
+            "active": self.is_active,
+            "session": self.session_id,
+            "speed": self.speed,
+            "paused": self.is_paused,
+            "finished": self.is_finished,
+            "position": round(self.position, 2),
+            "duration": round(index.duration, 2) if index else None,
+            "error": self.error
+        }
+
+    def _reanchor(self):
+        # Caller holds self._lock. Playback time is measured from (now, current position).
+        self._anchor_wall = time.time()
+        self._anchor_t = self.position
+
+    # ================= DECODER (READ-AHEAD) =================
+    def _read_record(self, log, frame_no, last_t, fps):
+        """Reads sidecar lines up to the next frame line. Returns (frame record, events before it)."""
+        events = []
+        if log is not None:
+            for line in log:
+                record = _parse_line(line)
+                if record is None:
+                    continue
+                if record.get("type") == "event":
+                    events.append(record)
+                elif record.get("type") == "frame" and "t" in record:
+                    return record, events
+        # No sidecar: container timing. Sidecar ended early: keep time moving forward from the last record.
+        if log is not None and last_t is not None:
+            t = last_t + 1 / fps
+        else:
+            t = frame_no / fps
+        return {"frame": frame_no, "t": t, "detection": None}, events
+
+    def _decode(self, generation, buffer, index, position):
+        cap = None
+        log = None
+        try:
+            frame_no, offset = index.locate(position)
+            cap = cv2.VideoCapture(index.video_path)
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_no)
+            if offset is not None:
+                log = open(index.log_path, "r")
+                log.seek(offset)
+
+            pending = []
+            shown = 0
+            last_t = None
+            while generation == self._generation:
+                record, events = self._read_record(log, frame_no, last_t, index.fps)
+                frame_no += 1
+                last_t = record["t"]
+                catching_up = record["t"] < position
+                # At N x speed only every N-th frame is shown; grab() skips the retrieve/convert step
+                step = max(1, int(self.speed))
+                skip = catching_up or (shown % step != 0)
+                if not catching_up:
+                    shown += 1
+
+                if skip:
+                    ok, frame = cap.grab(), None
+                else:
+                    ok, frame = cap.read()
+                if not ok:
+                    break
+
+                if not catching_up:
+                    pending.extend(events)
+                if skip:
+                    continue
+                if not self._put(generation, buffer, (record, frame, pending)):
+                    return
+                pending = []
+        except Exception as e:
+            # Surface the failure in /api/replay/status instead of leaving playback waiting forever
+            if generation == self._generation:
+                self.error = f"Decoder failed: {e}"
+                print(f"⚠️ Replay decoder error: {e}")
+        finally:
+            if cap is not None:
+                cap.release()
+            if log is not None:
+                log.close()
+
+        # End of session (or decoder failure)
+        self._put(generation, buffer, None)
+
+    def _put(self, generation, buffer, item):
+        """Blocks while the read-ahead buffer is full, but gives up as soon as a seek/stop supersedes us."""
+        while generation == self._generation:
+            try:
+                buffer.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    # ================= PLAYBACK CLOCK =================
+    def _playback(self, player_generation):
+        while self.is_active and player_generation == self._player_generation:
+            # seek() swaps generation and buffer together under the lock; read them as a pair
+            with self._lock:
+                generation, buffer = self._generation, self._buffer
+            preview = self.is_paused and self._preview_generation == generation
+            if buffer is None or (self.is_paused and not preview):
+                time.sleep(0.05)
+                continue
+            try:
+                item = buffer.get(timeout=0.2)
+            except queue.Empty:
+                continue
+
+            if item is None:
+                self.is_finished = True
+                self.set_paused(True)
+                continue
+
+            record, frame, events = item
+            if preview:
+                # Show the frame at the new seek position, then stay paused
+                self._preview_generation = None
+                self._publish(record, frame, events)
+                continue
+
+            # Sleep until the frame is due, re-checking so speed changes, pauses and seeks apply immediately
+            delay = 0.0
+            while self.is_active and generation == self._generation:
+                if self.is_paused:
+                    time.sleep(0.05)
+                    continue
+                due = self._anchor_wall + (record["t"] - self._anchor_t) / self.speed
+                delay = due - time.time()
+                if delay <= 0:
+                    break
+                time.sleep(min(delay, 0.05))
+            if generation != self._generation:
+                continue
+            if delay < -0.5:
+                # Decoder fell behind; don't burst frames to catch up
+                with self._lock:
+                    self.position = record["t"]
+                    self._reanchor()
+            if player_generation != self._player_generation:
+                return
+
+            self._publish(record, frame, events)
+
+    def _publish(self, record, frame, events):
+        detection = record.get("detection")
+        if detection:
+            pred_x, pred_y = self.tracker.predict()
+            self.tracker.update([detection["x"], detection["y"]])
+            detection = dict(detection, pred_x=pred_x, pred_y=pred_y)
+            cv2.circle(frame, (int(detection["x"]), int(detection["y"])), 12, (0, 255, 0), 2)
+            cv2.circle(frame, (int(pred_x), int(pred_y)), 6, (0, 165, 255), -1)
+        cv2.putText(frame, f"REPLAY {self.speed:g}x  T+{record['t']:.1f}s", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+
+        self.position = record["t"]
+        self.current_detection = detection
+        self.current_annotated_frame = frame
+        self.events.extend(events)
+
+    # ================= CONSUMER API (same shape as VisionEngine) =================
+    def get_latest_frame_and_detections(self):
+        return self.current_annotated_frame, self.current_detection
+
+    def current_timestamp(self):
+        """Wall-clock time the current frame was originally captured."""
+        index = self.index
+        if index and index.started:
+            return index.started + self.position
+        return time.time()
+
+    def pop_event(self):
+        try:
+            return self.events.popleft()
+        except IndexError:
+            return None
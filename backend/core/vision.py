@@ -6,6 +6,8 @@ import functools
 import threading
 from ultralytics import YOLO
 from dotenv import load_dotenv
+from core.camera_discovery import capture_api
+from core.replay import encode_record
 
 load_dotenv()
 
@@ -22,6 +24,11 @@ class VisionEngine:
         self.FOCAL_LENGTH = 600  
         self.is_recording = False
         self.video_writer = None
+        # Sidecar telemetry log (recordings/mission_*.jsonl) so sessions can be replayed
+        self.telemetry_log = None
+        self.recording_started = None
+        self.recorded_frames = 0
+        self.record_lock = threading.Lock()
         os.makedirs("recordings", exist_ok=True)
         
         # --- SHARED MEMORY ---
@@ -40,8 +47,8 @@ class VisionEngine:
         
         try:
             self.model = YOLO(self.model_path)
-            # FORCE WINDOWS DIRECTSHOW API TO TURN ON THE HARDWARE LIGHT
-            self.camera = cv2.VideoCapture(self.camera_index, cv2.CAP_DSHOW) 
+            # Native capture API per OS (DirectShow on Windows, V4L2 on Linux) to turn on the hardware light
+            self.camera = cv2.VideoCapture(self.camera_index, capture_api())
             time.sleep(1.0)
             self.is_ready = True
             print(f"✅ 🛡️ Sky-Watch Vision Engine Online & Ready on Camera {self.camera_index}.")
@@ -87,6 +94,13 @@ class VisionEngine:
 
             if self.is_recording and self.video_writer is not None:
                 self.video_writer.write(frame)
+                self._log_record(
+                    "frame",
+                    frame=self.recorded_frames,
+                    t=round(time.time() - self.recording_started, 4),
+                    detection=detection
+                )
+                self.recorded_frames += 1
                 
             time.sleep(0.03) # Cap at ~30 FPS to save CPU
 
@@ -111,10 +125,34 @@ class VisionEngine:
             
             time.sleep(0.03) # Match the 30 FPS rate
             
+    def _log_record(self, record_type, **fields):
+        """Appends one JSON line to the active session's telemetry sidecar."""
+        # encode_record keeps "type" as the first key; ReplayEngine's seek index matches on that prefix
+        with self.record_lock:
+            if self.telemetry_log is not None:
+                self.telemetry_log.write(encode_record(record_type, **fields))
+
+    def record_event(self, msg, level):
+        """Websocket calls this for every log line it shows, so replays include the event log."""
+        if self.is_recording and self.recording_started is not None:
+            self._log_record(
+                "event",
+                t=round(time.time() - self.recording_started, 4),
+                msg=msg,
+                level=level
+            )
+
     def toggle_recording(self):
         self.is_recording = not self.is_recording
         if self.is_recording and self.camera:
-            filename = f"recordings/mission_{int(time.time())}.mp4"
+            self.recording_started = time.time()
+            self.recorded_frames = 0
+            base = f"recordings/mission_{int(self.recording_started)}"
+            filename = f"{base}.mp4"
+            # Open the sidecar before the writer so every video frame gets a matching "frame" line
+            with self.record_lock:
+                self.telemetry_log = open(f"{base}.jsonl", "w", buffering=1)
+            self._log_record("session", started=self.recording_started, video=os.path.basename(filename))
             fourcc = cv2.VideoWriter_fourcc(*'mp4v')
             width = int(self.camera.get(cv2.CAP_PROP_FRAME_WIDTH))
             height = int(self.camera.get(cv2.CAP_PROP_FRAME_HEIGHT))
@@ -125,4 +163,8 @@ class VisionEngine:
                 self.video_writer.release()
                 self.video_writer = None
                 print("⏹️ RECORDING SAVED")
+            with self.record_lock:
+                if self.telemetry_log is not None:
+                    self.telemetry_log.close()
+                    self.telemetry_log = None
         return self.is_recording
\ No newline at end of file
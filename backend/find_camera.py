@@ -1,22 +1,26 @@
-import cv2
+from core.camera_discovery import CameraRegistry
 
-print("🔍 Searching for available cameras (Indices 0-9)...")
-available_cameras = []
+print("🔍 Searching for available cameras...")
+registry = CameraRegistry()
+cameras = registry.get_devices()
 
-for i in range(10):
-    # CAP_DSHOW is the native Windows DirectShow API, often more reliable
-    cap = cv2.VideoCapture(i, cv2.CAP_DSHOW) 
-    
-    if cap.isOpened():
-        ret, frame = cap.read()
-        if ret:
-            print(f"✅ LIVE Camera found at index: {i}")
-            available_cameras.append(i)
-        else:
-            print(f"⚠️ Device at index {i} opened, but returned no video (Virtual/Dead camera).")
-        cap.release()
+live_cameras = []
+for cam in cameras:
+    if cam["status"] != "LIVE":
+        print(f"⚠️ Device at index {cam['index']} is {cam['status']} ({cam.get('error', 'no response')}).")
+        continue
 
-if not available_cameras:
-    print("\n❌ CRITICAL: Windows is blocking all cameras. Check 'Camera Privacy Settings' in your Start Menu.")
+    live_cameras.append(cam["index"])
+    print(f"✅ LIVE Camera found at index: {cam['index']} - {cam['name']} [{cam['driver']}]")
+    for fmt in cam["formats"]:
+        modes = ", ".join(
+            f"{res['width']}x{res['height']}@{max(res['fps']) if res['fps'] else '?'}"
+            for res in fmt["resolutions"]
+        )
+        print(f"    {fmt['fourcc']}: {modes}")
+
+if not live_cameras:
+    print("\n❌ CRITICAL: No cameras detected. Check device permissions (video group) or 'Camera Privacy Settings' on Windows.")
 else:
-    print(f"\n🎯 SUCCESS! Open your backend/.env file and set CAMERA_INDEX={available_cameras[0]}")
\ No newline at end of file
+    print(f"\n🎯 SUCCESS! Open your backend/.env file and set CAMERA_INDEX={live_cameras[0]}")
+    print("   (The running backend also lists these at GET /api/cameras)")
@@ -12,4 +12,5 @@ class TelemetryData(BaseModel):
     closing_velocity: Optional[float] = None
     distance: Optional[float] = None
     system_log: Optional[str] = None
-    log_level: Optional[str] = "INFO" # "INFO", "WARN", "CMD", "SUCCESS"
\ No newline at end of file
+    log_level: Optional[str] = "INFO" # "INFO", "WARN", "CMD", "SUCCESS"
+    replay_position: Optional[float] = None # Seconds into a replayed session, None when live
@@ -10,4 +10,5 @@ export interface TelemetryData {
   distance: number | null;
   system_log?: string | null;
   log_level?: string | null;
+  replay_position?: number | null;
 }
\ No newline at end of file